@@ -1,83 +1,119 @@
 #!/usr/bin/env python3
+import os
 import sys
+import importlib
 import time
+import asyncio
 import threading
 import subprocess
 import platform
+import locale
 import re
-from collections import defaultdict, deque
+from collections import OrderedDict
 import math
 
+import matplotlib
+# Backend: MPL_BACKEND wins if set; otherwise prefer Qt, which redraws live plots much
+# faster than Tk. Headless Linux and machines without Qt keep matplotlib's default.
+if not os.environ.get('MPL_BACKEND') and (sys.platform != 'linux' or os.environ.get('DISPLAY')
+                                          or os.environ.get('WAYLAND_DISPLAY')):
+    for _backend in ('QtAgg', 'Qt5Agg'):
+        try:
+            importlib.import_module('matplotlib.backends.backend_' + _backend.lower())
+        except Exception:
+            continue
+        matplotlib.use(_backend)
+        break
+if matplotlib.__version__.startswith('2.1.1'):
+    print("Warning: matplotlib 2.1.1 redraws interactive plots very slowly, please upgrade", file=sys.stderr)
 import matplotlib.pyplot as plt
 import matplotlib.animation as animation
+from matplotlib.collections import PolyCollection
+try:
+    from numba import njit
+except Exception:
+    njit = None
 import numpy as np
 
+# ------------------ Precompiled regexes ------------------
+# scan tool output is parsed as bytes; only SSIDs get decoded
+_RE_COLS = re.compile(rb'\s{2,}')
+_RE_CELL = re.compile(rb'Cell \d+ - ')
+_RE_ESSID = re.compile(rb'ESSID:"([^"]*)"')
+_RE_FREQ_GHZ = re.compile(rb'Frequency:([0-9.]+)\s*GHz')
+_RE_CH_COLON = re.compile(rb'Channel[:=]?\s*([0-9]+)')
+_RE_DBM = re.compile(rb'Signal level[=\:]\s*([-\d]+)\s*dBm')
+_RE_NETSH_BLOCK = re.compile(rb'\r?\n\s*SSID\s+\d+\s*:\s*')
+_RE_CHAN = re.compile(rb'Channel\s*:\s*(\d+)')
+_RE_SIG_PCT = re.compile(rb'Signal\s*:\s*([0-9]+)%')
+_RE_IWCONFIG_IFACE = re.compile(rb'([a-zA-Z0-9]+)\s+IEEE 802.11')
+_RE_IW_IFACE = re.compile(rb'Interface\s+(\S+)')
+_RE_IW_PHY_FREQ = re.compile(rb'^\s*\*\s*([0-9.]+)\s*MHz')
+_RE_IW_BSS = re.compile(rb'^BSS ', re.M)
+_RE_IW_SSID = re.compile(rb'^\s*SSID: ?(.*)$', re.M)
+_RE_IW_FREQ = re.compile(rb'freq:\s*([0-9.]+)')
+_RE_IW_SIGNAL = re.compile(rb'signal:\s*(-?[0-9.]+)\s*dBm')
+
+# same encoding universal_newlines=True used to decode tool output
+_ENCODING = locale.getpreferredencoding(False)
+
 # ------------------ Helpers (kanava <-> taajuus) ------------------
+_FREQ_5GHZ = {
+    36: 5180, 40: 5200, 44: 5220, 48: 5240,
+    52: 5260, 56: 5280, 60: 5300, 64: 5320,
+    100: 5500, 104: 5520, 108: 5540, 112: 5560, 116: 5580,
+    120: 5600, 124: 5620, 128: 5640, 132: 5660, 136: 5680,
+    140: 5700, 144: 5720, 149: 5745, 153: 5765,
+    157: 5785, 161: 5805, 165: 5825
+}
+
 def channel_to_freq_mhz(channel):
-    try:
-        ch = int(channel)
-    except Exception:
+    if channel is None:
         return None
-    if 1 <= ch <= 14:
-        return 2407 + 5 * ch
-    table = {
-        36: 5180, 40: 5200, 44: 5220, 48: 5240,
-        52: 5260, 56:5280, 60:5300, 64:5320,
-        100:5500,104:5520,108:5540,112:5560,116:5580,120:5600,124:5620,128:5640,
-        132:5660,136:5680,140:5700,144:5720,
-        149:5745,153:5765,157:5785,161:5805,165:5825
-    }
-    return table.get(ch)
+    if not isinstance(channel, int):
+        try:
+            channel = int(channel)
+        except (TypeError, ValueError):
+            return None
+    if 1 <= channel <= 14:
+        return 2407 + 5 * channel
+    return _FREQ_5GHZ.get(channel)
 
 # ------------------ Platform parsers (kevyet, kuten aiemmin) ------------------
 def parse_nmcli(output):
+    # nmcli -t -e no: one "SSID:CHAN:SIGNAL" record per line, signal in percent
     networks = []
-    lines = output.strip().splitlines()
-    for line in lines:
-        if not line.strip():
-            continue
-        # Split by two or more spaces (nmcli aligns in columns)
-        parts = [p.strip() for p in re.split(r'\s{2,}', line) if p.strip()]
-        if not parts:
-            continue
-        # If header line, skip
-        if parts[0].lower().startswith('ssid') or parts[0].lower().startswith('in-use'):
+    for line in output.splitlines():
+        # CHAN and SIGNAL never contain ':', so split from the right (the SSID may)
+        parts = line.rsplit(b':', 2)
+        if len(parts) != 3:
             continue
-        ssid = parts[0]
-        chan = None
-        sig = None
-        # try find channel (a small number) and signal (percent)
-        for token in parts[1:]:
-            if re.match(r'^\d+$', token):
-                chan = token
-            m = re.search(r'(\d+)$', token)
-            if m and (token.endswith('%') or (int(m.group(1)) <= 100 and 'signal' in ' '.join(parts).lower())):
-                sig = float(m.group(1))
-        freq = channel_to_freq_mhz(int(chan)) if chan else None
+        ssid, chan, sig = parts
+        freq = channel_to_freq_mhz(int(chan)) if chan.isdigit() else None
         dbm = None
-        if sig is not None:
+        if sig.isdigit():
             # approximate conversion % -> dBm (very rough) (0% -> -100, 100% -> -50)
-            dbm = (sig / 100.0) * 50.0 - 100.0
-        networks.append({'ssid': ssid or '<hidden>', 'freq_mhz': freq, 'dbm': dbm})
+            dbm = (int(sig) / 100.0) * 50.0 - 100.0
+        networks.append({'ssid': ssid.decode(_ENCODING, 'replace') or '<hidden>', 'freq_mhz': freq, 'dbm': dbm})
     return networks
 
 def parse_iwlist(output):
     networks = []
-    cells = re.split(r'Cell \d+ - ', output)
+    cells = _RE_CELL.split(output)
     for c in cells:
         if not c.strip():
             continue
-        ssid_m = re.search(r'ESSID:"([^"]*)"', c)
-        freq_m = re.search(r'Frequency:([0-9.]+)\s*GHz', c)
-        ch_m = re.search(r'Channel[:=]?\s*([0-9]+)', c)
-        ssid = ssid_m.group(1) if ssid_m else '<hidden>'
+        ssid_m = _RE_ESSID.search(c)
+        freq_m = _RE_FREQ_GHZ.search(c)
+        ch_m = _RE_CH_COLON.search(c)
+        ssid = ssid_m.group(1).decode(_ENCODING, 'replace') if ssid_m else '<hidden>'
         freq = None
         if freq_m:
             freq = float(freq_m.group(1)) * 1000.0
         elif ch_m:
             freq = channel_to_freq_mhz(int(ch_m.group(1)))
         dbm = None
-        dbm_m = re.search(r'Signal level[=\:]\s*([-\d]+)\s*dBm', c)
+        dbm_m = _RE_DBM.search(c)
         if dbm_m:
             dbm = float(dbm_m.group(1))
         networks.append({'ssid': ssid, 'freq_mhz': freq, 'dbm': dbm})
@@ -85,19 +121,19 @@ def parse_iwlist(output):
 
 def parse_netsh(output):
     networks = []
-    ssid_blocks = re.split(r'\r?\n\s*SSID\s+\d+\s*:\s*', output)
+    ssid_blocks = _RE_NETSH_BLOCK.split(output)
     for blk in ssid_blocks[1:]:
         lines = blk.splitlines()
         if not lines:
             continue
-        ssid = lines[0].strip() or '<hidden>'
+        ssid = lines[0].strip().decode(_ENCODING, 'replace') or '<hidden>'
         channel = None
         dbm = None
         for L in lines[1:]:
-            mchan = re.search(r'Channel\s*:\s*(\d+)', L)
+            mchan = _RE_CHAN.search(L)
             if mchan:
                 channel = int(mchan.group(1))
-            msignal = re.search(r'Signal\s*:\s*([0-9]+)%', L)
+            msignal = _RE_SIG_PCT.search(L)
             if msignal:
                 pct = int(msignal.group(1))
                 dbm = (pct/100.0)*50.0 - 100.0
@@ -111,162 +147,328 @@ def parse_airport(output):
     for line in lines[1:]:
         if not line.strip():
             continue
-        parts = re.split(r'\s{2,}', line.strip())
-        ssid = parts[0] if parts else '<hidden>'
+        parts = _RE_COLS.split(line.strip())
+        ssid = parts[0].decode(_ENCODING, 'replace') if parts else '<hidden>'
         # try to find channel token like "36" or "11"
         ch = None
         rssi = None
         for token in parts:
-            if re.match(r'^\d{1,3}(?:,.*)?$', token):
-                ch = int(token.split(',')[0])
-            if re.match(r'^-?\d+\s*$', token):
-                val = int(token.strip())
+            head = token.split(b',', 1)[0]
+            if head.isdigit() and len(head) <= 3:
+                ch = int(head)
+            t = token.rstrip()
+            if (t[1:] if t.startswith(b'-') else t).isdigit():
+                val = int(t)
                 if -120 < val < 0:
                     rssi = val
         freq = channel_to_freq_mhz(ch) if ch else None
         networks.append({'ssid': ssid, 'freq_mhz': freq, 'dbm': rssi})
     return networks
 
+def parse_iw_phy(output):
+    # usable channel frequencies (MHz) from `iw phy`, skipping disabled ones
+    freqs = []
+    for line in output.splitlines():
+        m = _RE_IW_PHY_FREQ.match(line)
+        if m and b'disabled' not in line:
+            f = int(float(m.group(1)))
+            if f not in freqs:
+                freqs.append(f)
+    return freqs
+
+def parse_iw(output):
+    # `iw dev <iface> scan` output: one "BSS ..." block per access point
+    networks = []
+    for blk in _RE_IW_BSS.split(output)[1:]:
+        ssid_m = _RE_IW_SSID.search(blk)
+        freq_m = _RE_IW_FREQ.search(blk)
+        sig_m = _RE_IW_SIGNAL.search(blk)
+        ssid = ssid_m.group(1).strip().decode(_ENCODING, 'replace') if ssid_m else ''
+        freq = float(freq_m.group(1)) if freq_m else None
+        dbm = float(sig_m.group(1)) if sig_m else None
+        networks.append({'ssid': ssid or '<hidden>', 'freq_mhz': freq, 'dbm': dbm})
+    return networks
+
 # ------------------ Platform scan functions ------------------
-def scan_linux():
+_OS = platform.system().lower()  # invariant for the process, resolved once
+
+async def _run(cmd, timeout):
+    # like subprocess.check_output(..., timeout=...) but awaitable, so scans can overlap; returns raw bytes
+    proc = await asyncio.create_subprocess_exec(*cmd, stdout=asyncio.subprocess.PIPE,
+                                                stderr=asyncio.subprocess.DEVNULL)
+    try:
+        out, _ = await asyncio.wait_for(proc.communicate(), timeout)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        raise
+    if proc.returncode:
+        raise subprocess.CalledProcessError(proc.returncode, cmd)
+    return out
+
+async def scan_iwlist(iface):
+    out = await _run(['sudo', 'iwlist', iface, 'scan'], 12)
+    return parse_iwlist(out)
+
+_iw_ifaces = None  # interfaces found by iwconfig, reused until an iwlist scan fails
+
+# Channel hopping with `iw`: a scan limited to a few channels returns in tens of ms where a
+# full sweep can take seconds, so each tick probes the next HOP_FREQS_PER_SCAN channels
+# round-robin and reports the other channels from their most recent scan.
+HOP_FREQS_PER_SCAN = 4
+_hop_dev = None
+_hop_freqs = []
+_hop_pos = 0
+_hop_by_freq = {}  # channel MHz -> networks from the latest scan of that channel
+_hop_failures = 0  # consecutive failures; hopping is given up after 3
+_hop_ok = False    # at least one hop scan has succeeded
+
+async def scan_iw_hop():
+    global _hop_dev, _hop_freqs, _hop_pos
+    if _hop_dev is None:
+        m = _RE_IW_IFACE.search(await _run(['iw', 'dev'], 2))
+        freqs = parse_iw_phy(await _run(['iw', 'phy'], 2))
+        if not m or not freqs:
+            raise RuntimeError('no wireless interface for iw')
+        _hop_dev, _hop_freqs = m.group(1).decode(), freqs
+    batch = [_hop_freqs[(_hop_pos + i) % len(_hop_freqs)] for i in range(min(HOP_FREQS_PER_SCAN, len(_hop_freqs)))]
+    _hop_pos = (_hop_pos + len(batch)) % len(_hop_freqs)
+    out = await _run(['iw', 'dev', _hop_dev, 'scan', 'freq'] + [str(f) for f in batch], 2)
+    # iw prints the kernel's whole BSS cache, not just the scanned channels: keep only the
+    # batch's channels (others may be stale) and replace their lists instead of appending
+    fresh = {f: [] for f in batch}
+    for net in parse_iw(out):
+        if net['freq_mhz']:
+            nets = fresh.get(int(net['freq_mhz']))
+            if nets is not None:
+                nets.append(net)
+    _hop_by_freq.update(fresh)
+    return [net for nets in _hop_by_freq.values() for net in nets]
+
+async def scan_linux():
+    global _iw_ifaces, _hop_failures, _hop_ok
+    if _hop_failures < 3:
+        try:
+            nets = await scan_iw_hop()
+            _hop_failures = 0
+            _hop_ok = True
+            return nets
+        except Exception:
+            _hop_failures += 1
+            # transient failure (e.g. EBUSY while NetworkManager scans): repeat the cached channels
+            # rather than mixing nmcli's percent estimate into iw's measured dBm
+            if _hop_ok and _hop_failures < 3:
+                return [net for nets in _hop_by_freq.values() for net in nets]
     try:
-        out = subprocess.check_output(['nmcli', '-f', 'SSID,CHAN,SIGNAL', 'device', 'wifi', 'list'],
-                                      stderr=subprocess.DEVNULL, universal_newlines=True, timeout=6)
+        out = await _run(['nmcli', '-t', '-e', 'no', '-f', 'SSID,CHAN,SIGNAL', 'device', 'wifi', 'list'], 6)
         parsed = parse_nmcli(out)
         if parsed:
             return parsed
     except Exception:
         pass
     try:
-        iwconfig_out = subprocess.check_output(['iwconfig'], stderr=subprocess.DEVNULL, universal_newlines=True, timeout=4)
-        m = re.search(r'([a-zA-Z0-9]+)\s+IEEE 802.11', iwconfig_out)
-        iface = m.group(1) if m else 'wlan0'
-        out = subprocess.check_output(['sudo', 'iwlist', iface, 'scan'], stderr=subprocess.DEVNULL, universal_newlines=True, timeout=12)
-        return parse_iwlist(out)
+        if not _iw_ifaces:
+            iwconfig_out = await _run(['iwconfig'], 4)
+            _iw_ifaces = [i.decode() for i in _RE_IWCONFIG_IFACE.findall(iwconfig_out)] or ['wlan0']
+        # scan every wireless interface concurrently
+        results = await asyncio.gather(*[scan_iwlist(i) for i in _iw_ifaces], return_exceptions=True)
+        if any(isinstance(r, BaseException) for r in results):
+            _iw_ifaces = None  # re-detect interfaces on the next scan
+        return [net for r in results if not isinstance(r, BaseException) for net in r]
     except Exception:
+        _iw_ifaces = None
         return []
 
-def scan_windows():
+async def scan_windows():
     try:
-        out = subprocess.check_output(['netsh', 'wlan', 'show', 'networks', 'mode=bssid'],
-                                      stderr=subprocess.DEVNULL, universal_newlines=True, timeout=8)
+        out = await _run(['netsh', 'wlan', 'show', 'networks', 'mode=bssid'], 8)
         return parse_netsh(out)
     except Exception:
         return []
 
-def scan_macos():
+async def scan_macos():
     try:
-        out = subprocess.check_output(['/System/Library/PrivateFrameworks/Apple80211.framework/Versions/Current/Resources/airport', '-s'],
-                                      stderr=subprocess.DEVNULL, universal_newlines=True, timeout=6)
+        out = await _run(['/System/Library/PrivateFrameworks/Apple80211.framework/Versions/Current/Resources/airport', '-s'], 6)
         return parse_airport(out)
     except Exception:
         try:
-            out = subprocess.check_output(['/usr/sbin/airport', '-s'], stderr=subprocess.DEVNULL, universal_newlines=True, timeout=6)
+            out = await _run(['/usr/sbin/airport', '-s'], 6)
             return parse_airport(out)
         except Exception:
             return []
 
-def scan_wifi():
-    osn = platform.system().lower()
-    if 'linux' in osn:
-        return scan_linux()
-    elif 'windows' in osn:
-        return scan_windows()
-    elif 'darwin' in osn:
-        return scan_macos()
-    else:
-        return []
+async def scan_unsupported():
+    return []
+
+# the platform can't change while running, so pick its scan function once
+scan_wifi = (scan_linux if 'linux' in _OS else
+             scan_windows if 'windows' in _OS else
+             scan_macos if 'darwin' in _OS else
+             scan_unsupported)
 
 # ------------------ Live plotting data structures ------------------
 MAX_POINTS = 60  # how many time-steps to keep (e.g. 60 samples)
+MAX_SSIDS = 256  # rows in the history matrix; least recently seen SSIDs are evicted beyond this
+TOP_N = 12  # networks drawn per frame
 UPDATE_INTERVAL_MS = 2000  # update every 2000 ms (2s)
 
-# map ssid -> deque of last dBm values
-history = defaultdict(lambda: deque(maxlen=MAX_POINTS))
-# maintain fixed time axis (seconds relative)
-time_axis = deque(maxlen=MAX_POINTS)
+# history[row, col]: dBm of SSID `row` at scan step `col` (circular, MISSING = not seen).
+# Whole dBm fit in int8 (a quarter of float32); converted to float only for drawing.
+MISSING = -128
+history = np.full((MAX_SSIDS, MAX_POINTS), MISSING, dtype=np.int8)
+_row_of = OrderedDict()  # ssid -> row, least recently seen first (LRU eviction order)
+_ssid_of_row = []  # row -> ssid
+_step = 0  # number of scan steps written so far
+# scan timestamps, same circular columns as history; _times_rel is reused for the relative axis
+_times = np.zeros(MAX_POINTS, dtype=np.float64)
+_times_rel = np.empty(MAX_POINTS, dtype=np.float64)
 
 # colors
 _color_cycle = plt.rcParams['axes.prop_cycle'].by_key()['color']
 
 _lock = threading.Lock()
 _last_scan_time = None
+_dirty = False  # set by the scanner, cleared once update_plot has drawn the new data
 
 def scanner_thread_func(stop_event):
-    global _last_scan_time
+    # the scanner runs as an asyncio task on its own event loop in this thread
+    asyncio.run(scanner_loop(stop_event))
+
+async def scanner_loop(stop_event):
+    global _last_scan_time, _step, _dirty
     while not stop_event.is_set():
-        nets = scan_wifi()
+        nets = await scan_wifi()
         t = time.time()
+        # build the per-SSID updates before taking the lock so the plot thread isn't held up
+        updates = {}
+        for net in nets:
+            dbm = net.get('dbm')
+            # if no dBm, give a default weak value (so curve exists); whole dBm, clipped to int8
+            updates[net.get('ssid') or '<hidden>'] = -100 if dbm is None else max(-127, min(127, round(dbm)))
         with _lock:
-            # push current time
-            if not time_axis or (t - (time_axis[-1] if time_axis else 0) >= 0.9):
-                time_axis.append(t)
-            # update histories
-            seen = set()
-            for net in nets:
-                ssid = net.get('ssid') or '<hidden>'
-                dbm = net.get('dbm')
-                if dbm is None:
-                    # if no dBm, give a default weak value (so curve exists)
-                    dbm = -100.0
-                history[ssid].append(dbm)
-                seen.add(ssid)
-            # for SSIDs not seen this round, append NaN to advance their timeline
-            for s in list(history.keys()):
-                if s not in seen:
-                    # append a NaN or low value; NaN will create gap in plot
-                    history[s].append(np.nan)
+            # every step gets a column so times and rows stay aligned
+            col = _step % MAX_POINTS
+            _times[col] = t
+            # clear the column in one store: SSIDs not seen this round stay MISSING (gap in plot)
+            history[:, col] = MISSING
+            for ssid, dbm in updates.items():
+                row = _row_of.get(ssid)
+                if row is not None:
+                    _row_of.move_to_end(ssid)
+                elif len(_ssid_of_row) < MAX_SSIDS:
+                    row = len(_ssid_of_row)
+                    _row_of[ssid] = row
+                    _ssid_of_row.append(ssid)
+                else:
+                    # full: recycle the row of the least recently seen SSID
+                    _, row = _row_of.popitem(last=False)
+                    history[row] = MISSING
+                    _row_of[ssid] = row
+                    _ssid_of_row[row] = ssid
+                history[row, col] = dbm
+            _step += 1
             _last_scan_time = t
+            _dirty = True
         # sleep until next scan
-        time.sleep(max(0.5, UPDATE_INTERVAL_MS/1000.0 - 0.1))
+        await asyncio.sleep(max(0.5, UPDATE_INTERVAL_MS/1000.0 - 0.1))
+
+# ------------------ Frame preparation ------------------
+# display copy of the history (MISSING -> -120) and per-row max, reused every frame
+_display = np.empty((MAX_SSIDS, MAX_POINTS), dtype=np.float32)
+_maxes = np.empty(MAX_SSIDS, dtype=np.float32)
+
+def prep_frame(M, out, maxes):
+    # out = M as float with missing samples at -120, maxes = per-row max (-999 for rows with no samples)
+    missing = M == MISSING
+    np.copyto(out, M)
+    out[missing] = -120.0
+    np.max(M, axis=1, out=maxes)
+    maxes[maxes == MISSING] = -999.0
+
+if njit is not None:
+    # numba: both outputs in a single pass over the matrix. No parallel: a few hundred
+    # rows of 60 bytes is less work than spawning threads.
+    @njit(cache=True)
+    def prep_frame(M, out, maxes):
+        for i in range(M.shape[0]):
+            mx = -999.0
+            for t in range(M.shape[1]):
+                v = M[i, t]
+                if v == MISSING:
+                    out[i, t] = -120.0
+                else:
+                    out[i, t] = v
+                    if v > mx:
+                        mx = v
+            maxes[i] = mx
 
 # ------------------ Plotting ------------------
 fig, ax = plt.subplots(figsize=(12,6))
-lines = {}
-fills = {}
-legend_texts = []
+# fixed pool of artists reused every frame (blitting needs persistent artists)
+_lines = []
+_fills = []
+_labels = []
 
 def init_plot():
-    ax.clear()
-    ax.set_title("Aktiivinen Wi-Fi -aaltokuvaaja (signaali dBm vs aika)")
+    ax.set_title("Aktiivinen Wi-Fi -aaltokuvaaja (päivittyy joka {} ms)".format(UPDATE_INTERVAL_MS))
     ax.set_xlabel("Aika (s, viimeiset ~{})".format(MAX_POINTS))
     ax.set_ylabel("Signal strength (dBm)")
-    ax.set_ylim(-110, -30)
-    ax.grid(True, alpha=0.3)
+    ax.set_ylim(-120, -30)
+    ax.grid(True, alpha=0.25)
+    if not _lines:
+        for i in range(TOP_N):
+            color = _color_cycle[i % len(_color_cycle)]
+            line, = ax.plot([], [], color=color, linewidth=1.5, visible=False)
+            _lines.append(line)
+            _fills.append(ax.add_collection(PolyCollection([], alpha=0.12, color=color), autolim=False))
+            # legend entries as plain text artists; ax.legend() can't be blitted
+            _labels.append(ax.text(0.01, 0.98 - i * 0.04, '', transform=ax.transAxes,
+                                   color=color, fontsize='small', va='top'))
+    return _fills + _lines + _labels
 
 def update_plot(frame):
+    global _dirty
     with _lock:
-        if not time_axis:
-            return
-        times = np.array(time_axis)
-        t0 = times[0]
-        times_rel = times - times[-1]  # show negative (past) relative seconds
-        ssids = sorted(history.keys(), key=lambda s: np.nanmax(np.array(history[s])) if history[s] else -999)
-        # keep top N networks to avoid clutter
-        top_ssids = ssids[:12]
-        ax.clear()
-        init_plot()
-        # plot each ssid as filled waveform
-        for i, ssid in enumerate(top_ssids):
-            vals = np.array(history[ssid])
-            if vals.size == 0:
-                continue
-            color = _color_cycle[i % len(_color_cycle)]
-            # smoother: interpolate missing NaNs for plotting; keep NaNs to show gaps
-            x = times_rel
-            y = vals
-            # simpler smoothing: replace single NaNs with -120 to push curve down
-            y_plot = np.where(np.isnan(y), -120.0, y)
-            # vertical offset or stacking? we overlay with alpha
-            ax.plot(x, y_plot, label=ssid, color=color, linewidth=1.5)
-            ax.fill_between(x, y_plot, -120, where=~np.isnan(y), alpha=0.12, color=color)
-        ax.set_xlim(times_rel[0], 0.5)
-        ax.legend(loc='upper left', fontsize='small', ncol=1)
-        ax.set_ylim(-120, -30)
-        ax.set_xlabel("Aika (s, viimeiset ~{})".format(MAX_POINTS))
-        ax.set_ylabel("Signal strength (dBm)")
-        ax.set_title("Aktiivinen Wi-Fi -aaltokuvaaja (päivittyy joka {} ms)".format(UPDATE_INTERVAL_MS))
-        ax.grid(True, alpha=0.25)
+        # nothing new since the last draw: hand back the unchanged artists
+        if not _dirty or not _step:
+            return _fills + _lines + _labels
+        _dirty = False
+        # columns of the circular history in chronological order
+        cols = np.arange(_step - min(_step, MAX_POINTS), _step) % MAX_POINTS
+        # show negative (past) seconds relative to the newest scan
+        np.subtract(_times, _times[(_step - 1) % MAX_POINTS], out=_times_rel)
+        times_rel = _times_rel[cols]
+        n = len(_ssid_of_row)
+        # fill gaps (-120 pushes the curve down) and sort key in one call
+        prep_frame(history[:n], _display[:n], _maxes[:n])
+        maxes = _maxes[:n]
+        # keep the N strongest networks to avoid clutter: O(n) selection, then order just those N
+        top = np.argpartition(-maxes, TOP_N)[:TOP_N] if len(maxes) > TOP_N else np.arange(len(maxes))
+        top = top[np.argsort(-maxes[top], kind='stable')]
+        Y = _display[top][:, cols]
+        empty = maxes[top] == -999.0
+        names = [_ssid_of_row[r] for r in top]
+    # filled area under each curve: closed polygon down to the -120 baseline
+    poly_x = np.concatenate(([times_rel[0]], times_rel, [times_rel[-1]]))
+    for i, (line, fill, label) in enumerate(zip(_lines, _fills, _labels)):
+        if i < len(names):
+            line.set_data(times_rel, Y[i])
+            line.set_visible(True)
+            if empty[i]:
+                fill.set_verts([])
+            else:
+                fill.set_verts([np.column_stack((poly_x, np.concatenate(([-120.0], Y[i], [-120.0]))))])
+            label.set_text(names[i])
+        else:
+            line.set_visible(False)
+            fill.set_verts([])
+            label.set_text('')
+    # x range in 10 s steps; only touch the limits (and redraw the cached background) when it grows
+    left = min(-10.0, -10.0 * math.ceil(-times_rel[0] / 10.0))
+    if ax.get_xlim()[0] != left:
+        ax.set_xlim(left, 0.5)
+        fig.canvas.draw()
+    return _fills + _lines + _labels
 
 # ------------------ Main ------------------
 def main():
@@ -274,7 +476,9 @@ def main():
     scanner = threading.Thread(target=scanner_thread_func, args=(stop_event,), daemon=True)
     scanner.start()
     init_plot()
-    ani = animation.FuncAnimation(fig, update_plot, interval=UPDATE_INTERVAL_MS)
+    # no frame cache: the monitor runs for hours and the frames are never saved
+    ani = animation.FuncAnimation(fig, update_plot, init_func=init_plot, interval=UPDATE_INTERVAL_MS,
+                                  blit=True, cache_frame_data=False, save_count=0)
     try:
         plt.show()
     except KeyboardInterrupt:
@@ -282,6 +486,7 @@ def main():
     finally:
         stop_event.set()
         scanner.join(timeout=2)
+        plt.close(fig)
 
 if __name__ == '__main__':
     main()
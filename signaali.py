@@ -1,7 +1,34 @@
+import os
+import sys
+import importlib
 import pyaudio
 import numpy as np
+import matplotlib
+# Taustajärjestelmä: MPL_BACKEND voittaa jos asetettu, muuten Qt (piirtää nopeammin kuin Tk).
+# Ilman näyttöä (Linux) tai ilman Qt:ta käytetään matplotlibin oletusta.
+if not os.environ.get('MPL_BACKEND') and (sys.platform != 'linux' or os.environ.get('DISPLAY')
+                                          or os.environ.get('WAYLAND_DISPLAY')):
+    for _backend in ('QtAgg', 'Qt5Agg'):
+        try:
+            importlib.import_module('matplotlib.backends.backend_' + _backend.lower())
+        except Exception:
+            continue
+        matplotlib.use(_backend)
+        break
+if matplotlib.__version__.startswith('2.1.1'):
+    print("Varoitus: matplotlib 2.1.1 piirtää interaktiivisesti hyvin hitaasti, päivitä uudempaan", file=sys.stderr)
 import matplotlib.pyplot as plt
 
+# Nopeampi FFT-toteutus, jos saatavilla (pyFFTW tai scipy.fft), muuten numpy
+try:
+    import pyfftw
+except Exception:
+    pyfftw = None
+try:
+    import scipy.fft as scipy_fft
+except Exception:
+    scipy_fft = None
+
 # Määritellään äänen kuuntelu asetukset
 FORMAT = pyaudio.paInt16  # Äänen formaatti (16-bittinen)
 CHANNELS = 1              # Yksi kanava (mono)
@@ -20,41 +47,57 @@ print("Mikrofoni kuuntelee... Paina Ctrl+C lopettaaksesi.")
 # Valmistellaan graafinen ikkuna taajuuskomponenttien näyttämistä varten
 plt.ion()  # Interactive mode
 fig, ax = plt.subplots()
-x = np.linspace(0, RATE / 2, CHUNK // 2)
-line, = ax.plot(x, np.zeros(CHUNK // 2))
+# Positiiviset taajuudet lasketaan kerran (rfft palauttaa vain ne)
+POS_FREQ = np.fft.rfftfreq(CHUNK, 1 / RATE)[:CHUNK // 2]
+line, = ax.plot(POS_FREQ, np.zeros(CHUNK // 2))
 ax.set_ylim(0, 50000)  # Voit säätää y-akselin rajoja tarpeen mukaan
 ax.set_xlabel('Taajuus (Hz)')
 ax.set_ylabel('Amplitudi')
+plt.show(block=False)  # Avataan ikkuna heti, koska silmukka ei enää kutsu plt.pause
 
 # AD-muunnos raja-arvo
 AD_THRESHOLD = 25000
 
+# Silmukassa uudelleenkäytettävät puskurit
+amp = np.empty(CHUNK // 2, dtype=np.float32)
+mask = np.empty(CHUNK // 2, dtype=bool)
+
+if pyfftw is not None:
+    # FFTW-suunnitelma tehdään kerran kohdistetuille puskureille
+    fft_in = pyfftw.empty_aligned(CHUNK, dtype='float32')
+    fft_out = pyfftw.empty_aligned(CHUNK // 2 + 1, dtype='complex64')
+    fft_plan = pyfftw.FFTW(fft_in, fft_out, direction='FFTW_FORWARD', flags=('FFTW_MEASURE',))
+
+    def rfft(samples):
+        fft_in[:] = samples
+        return fft_plan()
+elif scipy_fft is not None:
+    rfft = scipy_fft.rfft
+else:
+    rfft = np.fft.rfft
+
 try:
     while True:
         # Lue äänidataa mikrofonilta
-        audio_data = np.frombuffer(stream.read(CHUNK), dtype=np.int16)
-        
-        # Suoritetaan FFT
-        fft_data = np.fft.fft(audio_data)
-        fft_freq = np.fft.fftfreq(len(fft_data), 1 / RATE)
+        audio_data = np.frombuffer(stream.read(CHUNK, exception_on_overflow=False), dtype=np.int16)
         
-        # Poimitaan vain positiiviset taajuudet ja niiden amplitudit
-        positive_freq = fft_freq[:CHUNK // 2]
-        positive_fft = np.abs(fft_data[:CHUNK // 2])
+        # Suoritetaan FFT (reaalinen syöte -> rfft laskee vain positiivisen puolen)
+        fft_data = rfft(audio_data)
         
-        # AD-muunnos: kaikki arvot yli rajan muutetaan ykkösiksi
-        positive_fft = np.where(positive_fft > AD_THRESHOLD, 1, positive_fft)
+        # Positiivisten taajuuksien amplitudit valmiiseen puskuriin
+        np.abs(fft_data[:CHUNK // 2], out=amp)
         
-        # Jos amplitudi ylittää raja-arvon, tulostetaan "1"
-        if np.any(positive_fft == 1):
-            print("1")  # Tulostaa "1" kun joku amplitudi ylittää raja-arvon
+        # AD-muunnos: jos jokin amplitudi ylittää raja-arvon, tulostetaan "1"
+        if np.greater(amp, AD_THRESHOLD, out=mask).any():
+            print("1")
         else:
             print("0")
 
         # Päivitetään graafi
-        line.set_ydata(positive_fft)
-        plt.draw()
-        plt.pause(0.1)  # Päivittää graafin joka 10 ms välein
+        line.set_ydata(amp)
+        # draw_idle + lyhyt tapahtumasilmukka on kevyempi kuin plt.pause
+        fig.canvas.draw_idle()
+        fig.canvas.start_event_loop(0.01)  # Päivittää graafin joka 10 ms välein
 
 except KeyboardInterrupt:
     print("\nOhjelma lopetettu.")
@@ -1,58 +1,96 @@
 #!/usr/bin/env python3
+import os
 import sys
+import importlib
 import time
+import asyncio
 import threading
 import subprocess
 import platform
+import locale
 import re
-from collections import defaultdict, deque
+from collections import OrderedDict
 import math
 import numpy as np
+import matplotlib
+# Backend: MPL_BACKEND wins if set; otherwise prefer Qt, which redraws live plots much
+# faster than Tk. Headless Linux and machines without Qt keep matplotlib's default.
+if not os.environ.get('MPL_BACKEND') and (sys.platform != 'linux' or os.environ.get('DISPLAY')
+                                          or os.environ.get('WAYLAND_DISPLAY')):
+    for _backend in ('QtAgg', 'Qt5Agg'):
+        try:
+            importlib.import_module('matplotlib.backends.backend_' + _backend.lower())
+        except Exception:
+            continue
+        matplotlib.use(_backend)
+        break
+if matplotlib.__version__.startswith('2.1.1'):
+    print("Warning: matplotlib 2.1.1 redraws interactive plots very slowly, please upgrade", file=sys.stderr)
 import matplotlib.pyplot as plt
 import matplotlib.animation as animation
+from matplotlib.collections import PolyCollection
+try:
+    from numba import njit
+except Exception:
+    njit = None
+
+_OS = platform.system().lower()
 
 # macOS CoreWLAN -tuki
-if platform.system().lower() == "darwin":
+CWInterface = None
+if _OS == "darwin":
     try:
         import objc
         from CoreWLAN import CWInterface
     except Exception:
         CWInterface = None
 
+# ------------------ Precompiled regexes ------------------
+# scan tool output is parsed as bytes; only SSIDs get decoded
+_RE_NETSH_BLOCK = re.compile(rb'\r?\n\s*SSID\s+\d+\s*:\s*')
+_RE_CHAN = re.compile(rb'Channel\s*:\s*(\d+)')
+_RE_SIG_PCT = re.compile(rb'Signal\s*:\s*([0-9]+)%')
+
+_ENCODING = locale.getpreferredencoding(False)
+
 # ------------------ Helpers ------------------
+_FREQ_5GHZ = {
+    36: 5180, 40: 5200, 44: 5220, 48: 5240,
+    52: 5260, 56: 5280, 60: 5300, 64: 5320,
+    100: 5500, 104: 5520, 108: 5540, 112: 5560, 116: 5580,
+    120: 5600, 124: 5620, 128: 5640, 132: 5660, 136: 5680,
+    140: 5700, 144: 5720, 149: 5745, 153: 5765,
+    157: 5785, 161: 5805, 165: 5825
+}
+
 def channel_to_freq_mhz(channel):
-    try:
-        ch = int(channel)
-    except Exception:
+    if channel is None:
         return None
-    if 1 <= ch <= 14:
-        return 2407 + 5 * ch
-    table = {
-        36: 5180, 40: 5200, 44: 5220, 48: 5240,
-        52: 5260, 56: 5280, 60: 5300, 64: 5320,
-        100: 5500, 104: 5520, 108: 5540, 112: 5560, 116: 5580,
-        120: 5600, 124: 5620, 128: 5640, 132: 5660, 136: 5680,
-        140: 5700, 144: 5720, 149: 5745, 153: 5765,
-        157: 5785, 161: 5805, 165: 5825
-    }
-    return table.get(ch)
+    if not isinstance(channel, int):
+        try:
+            channel = int(channel)
+        except (TypeError, ValueError):
+            return None
+    if 1 <= channel <= 14:
+        return 2407 + 5 * channel
+    return _FREQ_5GHZ.get(channel)
 
 # ------------------ Parsers ------------------
 def parse_netsh(output):
     networks = []
-    ssid_blocks = re.split(r'\r?\n\s*SSID\s+\d+\s*:\s*', output)
+    ssid_blocks = _RE_NETSH_BLOCK.split(output)
     for blk in ssid_blocks[1:]:
         lines = blk.splitlines()
         if not lines:
             continue
-        ssid = lines[0].strip() or '<hidden>'
+        ssid = lines[0].strip().decode(_ENCODING, 'replace') or '<hidden>'
         channel = None
         dbm = None
         for L in lines[1:]:
-            mchan = re.search(r'Channel\s*:\s*(\d+)', L)
+            mchan = _RE_CHAN.search(L)
             if mchan:
                 channel = int(mchan.group(1))
-            msignal = re.search(r'Signal\s*:\s*([0-9]+)%', L)
+            msignal = _RE_SIG_PCT.search(L)
             if msignal:
                 pct = int(msignal.group(1))
                 dbm = (pct / 100.0) * 50.0 - 100.0
@@ -61,100 +99,160 @@ def parse_netsh(output):
     return networks
 
 def parse_nmcli(output):
+    # nmcli -t -e no: one "SSID:CHAN:SIGNAL" record per line
     networks = []
-    lines = output.strip().splitlines()
-    for line in lines:
-        if not line.strip() or line.startswith("SSID"):
-            continue
-        parts = [p.strip() for p in re.split(r'\s{2,}', line) if p.strip()]
-        if not parts:
+    for line in output.splitlines():
+        parts = line.rsplit(b':', 2)
+        if len(parts) != 3:
             continue
-        ssid = parts[0]
-        chan = None
-        sig = None
-        for token in parts[1:]:
-            if re.match(r'^\d+$', token):
-                chan = token
-            m = re.search(r'(\d+)$', token)
-            if m and token.endswith('%'):
-                sig = float(m.group(1))
-        freq = channel_to_freq_mhz(int(chan)) if chan else None
-        dbm = (sig / 100.0) * 50.0 - 100.0 if sig is not None else None
-        networks.append({'ssid': ssid or '<hidden>', 'freq_mhz': freq, 'dbm': dbm})
+        ssid, chan, sig = parts
+        freq = channel_to_freq_mhz(int(chan)) if chan.isdigit() else None
+        dbm = (int(sig) / 100.0) * 50.0 - 100.0 if sig.isdigit() else None
+        networks.append({'ssid': ssid.decode(_ENCODING, 'replace') or '<hidden>', 'freq_mhz': freq, 'dbm': dbm})
     return networks
 
 # ------------------ Platform scan functions ------------------
-def scan_linux():
+async def _run(cmd, timeout):
+    proc = await asyncio.create_subprocess_exec(*cmd, stdout=asyncio.subprocess.PIPE,
+                                                stderr=asyncio.subprocess.DEVNULL)
+    try:
+        out, _ = await asyncio.wait_for(proc.communicate(), timeout)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        raise
+    if proc.returncode:
+        raise subprocess.CalledProcessError(proc.returncode, cmd)
+    return out
+
+async def scan_linux():
     try:
-        out = subprocess.check_output(['nmcli', '-f', 'SSID,CHAN,SIGNAL', 'device', 'wifi', 'list'],
-                                      stderr=subprocess.DEVNULL, universal_newlines=True, timeout=6)
+        out = await _run(['nmcli', '-t', '-e', 'no', '-f', 'SSID,CHAN,SIGNAL', 'device', 'wifi', 'list'], 6)
         return parse_nmcli(out)
     except Exception:
         return []
 
-def scan_windows():
+async def scan_windows():
     try:
-        out = subprocess.check_output(['netsh', 'wlan', 'show', 'networks', 'mode=bssid'],
-                                      stderr=subprocess.DEVNULL, universal_newlines=True, timeout=8)
+        out = await _run(['netsh', 'wlan', 'show', 'networks', 'mode=bssid'], 8)
         return parse_netsh(out)
     except Exception:
         return []
 
-def scan_macos():
+def _scan_corewlan():
+    iface = CWInterface.interface()
+    if iface is None:
+        return []
+    nets = iface.scanForNetworksWithName_error_(None, None)[0]
+    networks = []
+    for n in nets:
+        ssid = n.ssid() or "<hidden>"
+        rssi = n.rssiValue()
+        freq = n.wlanChannel().channelNumber()
+        freq_mhz = channel_to_freq_mhz(freq)
+        snr = n.noiseMeasurement()  # jos saatavilla
+        networks.append({'ssid': ssid, 'freq_mhz': freq_mhz, 'dbm': rssi, 'snr': snr})
+    return networks
+
+async def scan_macos():
     if CWInterface:
-        iface = CWInterface.interface()
-        if iface is None:
-            return []
-        nets = iface.scanForNetworksWithName_error_(None, None)[0]
-        networks = []
-        for n in nets:
-            ssid = n.ssid() or "<hidden>"
-            rssi = n.rssiValue()
-            freq = n.wlanChannel().channelNumber()
-            freq_mhz = channel_to_freq_mhz(freq)
-            snr = n.noiseMeasurement()  # jos saatavilla
-            networks.append({'ssid': ssid, 'freq_mhz': freq_mhz, 'dbm': rssi, 'snr': snr})
-        return networks
+        # CoreWLAN scan blocks, keep it off the event loop
+        return await asyncio.get_running_loop().run_in_executor(None, _scan_corewlan)
     return []
 
-def scan_wifi():
-    osn = platform.system().lower()
-    if 'linux' in osn:
-        return scan_linux()
-    elif 'windows' in osn:
-        return scan_windows()
-    elif 'darwin' in osn:
-        return scan_macos()
-    else:
-        return []
+async def scan_unsupported():
+    return []
+
+scan_wifi = (scan_linux if 'linux' in _OS else
+             scan_windows if 'windows' in _OS else
+             scan_macos if 'darwin' in _OS else
+             scan_unsupported)
 
 # ------------------ Live plotting ------------------
 MAX_POINTS = 60
+MAX_SSIDS = 256
+TOP_N = 10
 UPDATE_INTERVAL_MS = 2000
-history = defaultdict(lambda: deque(maxlen=MAX_POINTS))
-time_axis = deque(maxlen=MAX_POINTS)
+# history[row, col]: dBm of SSID `row` at scan step `col` (circular, MISSING = not seen).
+# Whole dBm fit in int8 (a quarter of float32); converted to float only for drawing.
+MISSING = -128
+history = np.full((MAX_SSIDS, MAX_POINTS), MISSING, dtype=np.int8)
+_row_of = OrderedDict()
+_ssid_of_row = []
+_step = 0
+_times = np.zeros(MAX_POINTS, dtype=np.float64)
+_times_rel = np.empty(MAX_POINTS, dtype=np.float64)
 _color_cycle = plt.rcParams['axes.prop_cycle'].by_key()['color']
 _lock = threading.Lock()
+_dirty = False
 
 def scanner_thread_func(stop_event):
+    asyncio.run(scanner_loop(stop_event))
+
+async def scanner_loop(stop_event):
+    global _step, _dirty
     while not stop_event.is_set():
-        nets = scan_wifi()
+        nets = await scan_wifi()
         t = time.time()
+        updates = {}
+        for net in nets:
+            dbm = net.get('dbm')
+            updates[net.get('ssid') or '<hidden>'] = -100 if dbm is None else max(-127, min(127, round(dbm)))
         with _lock:
-            if not time_axis or (t - (time_axis[-1] if time_axis else 0) >= 0.9):
-                time_axis.append(t)
-            seen = set()
-            for net in nets:
-                ssid = net.get('ssid') or '<hidden>'
-                dbm = net.get('dbm', -100.0)
-                history[ssid].append(dbm)
-                seen.add(ssid)
-            for s in list(history.keys()):
-                if s not in seen:
-                    history[s].append(np.nan)
-        time.sleep(max(0.5, UPDATE_INTERVAL_MS / 1000.0 - 0.1))
+            col = _step % MAX_POINTS
+            _times[col] = t
+            history[:, col] = MISSING
+            for ssid, dbm in updates.items():
+                row = _row_of.get(ssid)
+                if row is not None:
+                    _row_of.move_to_end(ssid)
+                elif len(_ssid_of_row) < MAX_SSIDS:
+                    row = len(_ssid_of_row)
+                    _row_of[ssid] = row
+                    _ssid_of_row.append(ssid)
+                else:
+                    _, row = _row_of.popitem(last=False)
+                    history[row] = MISSING
+                    _row_of[ssid] = row
+                    _ssid_of_row[row] = ssid
+                history[row, col] = dbm
+            _step += 1
+            _dirty = True
+        await asyncio.sleep(max(0.5, UPDATE_INTERVAL_MS / 1000.0 - 0.1))
+
+# display copy of the history (MISSING -> -120) and per-row max, reused every frame
+_display = np.empty((MAX_SSIDS, MAX_POINTS), dtype=np.float32)
+_maxes = np.empty(MAX_SSIDS, dtype=np.float32)
+
+def prep_frame(M, out, maxes):
+    # out = M as float with missing samples at -120, maxes = per-row max (-999 for rows with no samples)
+    missing = M == MISSING
+    np.copyto(out, M)
+    out[missing] = -120.0
+    np.max(M, axis=1, out=maxes)
+    maxes[maxes == MISSING] = -999.0
+
+if njit is not None:
+    # numba: both outputs in a single pass over the matrix. No parallel: a few hundred
+    # rows of 60 bytes is less work than spawning threads.
+    @njit(cache=True)
+    def prep_frame(M, out, maxes):
+        for i in range(M.shape[0]):
+            mx = -999.0
+            for t in range(M.shape[1]):
+                v = M[i, t]
+                if v == MISSING:
+                    out[i, t] = -120.0
+                else:
+                    out[i, t] = v
+                    if v > mx:
+                        mx = v
+            maxes[i] = mx
 
 fig, ax = plt.subplots(figsize=(12,6))
+_lines = []
+_fills = []
+_labels = []
 
 def init_plot():
     ax.set_title("Wi-Fi signaalitasot (dBm)")
@@ -162,37 +260,68 @@ def init_plot():
     ax.set_ylabel("Signaali (dBm)")
     ax.set_ylim(-120, -30)
     ax.grid(True, alpha=0.3)
+    if not _lines:
+        for i in range(TOP_N):
+            color = _color_cycle[i % len(_color_cycle)]
+            line, = ax.plot([], [], color=color, linewidth=1.5, visible=False)
+            _lines.append(line)
+            _fills.append(ax.add_collection(PolyCollection([], alpha=0.15, color=color), autolim=False))
+            _labels.append(ax.text(0.01, 0.98 - i * 0.04, '', transform=ax.transAxes,
+                                   color=color, fontsize='small', va='top'))
+    return _fills + _lines + _labels
 
 def update_plot(frame):
+    global _dirty
     with _lock:
-        if not time_axis:
-            return
-        times = np.array(time_axis)
-        times_rel = times - times[-1]
-        ssids = sorted(history.keys(), key=lambda s: np.nanmax(np.array(history[s])) if history[s] else -999)
-        top_ssids = ssids[:10]
-        ax.clear()
-        init_plot()
-        for i, ssid in enumerate(top_ssids):
-            vals = np.array(history[ssid])
-            color = _color_cycle[i % len(_color_cycle)]
-            y = np.where(np.isnan(vals), -120.0, vals)
-            ax.plot(times_rel, y, label=ssid, color=color, linewidth=1.5)
-            ax.fill_between(times_rel, y, -120, alpha=0.15, color=color)
-        ax.legend(loc='upper left', fontsize='small')
-        ax.set_xlim(times_rel[0], 0.5)
+        if not _dirty or not _step:
+            return _fills + _lines + _labels
+        _dirty = False
+        cols = np.arange(_step - min(_step, MAX_POINTS), _step) % MAX_POINTS
+        np.subtract(_times, _times[(_step - 1) % MAX_POINTS], out=_times_rel)
+        times_rel = _times_rel[cols]
+        n = len(_ssid_of_row)
+        prep_frame(history[:n], _display[:n], _maxes[:n])
+        maxes = _maxes[:n]
+        top = np.argpartition(-maxes, TOP_N)[:TOP_N] if len(maxes) > TOP_N else np.arange(len(maxes))
+        top = top[np.argsort(-maxes[top], kind='stable')]
+        Y = _display[top][:, cols]
+        empty = maxes[top] == -999.0
+        names = [_ssid_of_row[r] for r in top]
+    # filled area under each curve: closed polygon down to the -120 baseline
+    poly_x = np.concatenate(([times_rel[0]], times_rel, [times_rel[-1]]))
+    for i, (line, fill, label) in enumerate(zip(_lines, _fills, _labels)):
+        if i < len(names):
+            line.set_data(times_rel, Y[i])
+            line.set_visible(True)
+            if empty[i]:
+                fill.set_verts([])
+            else:
+                fill.set_verts([np.column_stack((poly_x, np.concatenate(([-120.0], Y[i], [-120.0]))))])
+            label.set_text(names[i])
+        else:
+            line.set_visible(False)
+            fill.set_verts([])
+            label.set_text('')
+    left = min(-10.0, -10.0 * math.ceil(-times_rel[0] / 10.0))
+    if ax.get_xlim()[0] != left:
+        ax.set_xlim(left, 0.5)
+        fig.canvas.draw()
+    return _fills + _lines + _labels
 
 def main():
     stop_event = threading.Event()
     scanner = threading.Thread(target=scanner_thread_func, args=(stop_event,), daemon=True)
     scanner.start()
     init_plot()
-    ani = animation.FuncAnimation(fig, update_plot, interval=UPDATE_INTERVAL_MS)
+    # no frame cache: the monitor runs for hours and the frames are never saved
+    ani = animation.FuncAnimation(fig, update_plot, init_func=init_plot, interval=UPDATE_INTERVAL_MS,
+                                  blit=True, cache_frame_data=False, save_count=0)
     try:
         plt.show()
     finally:
         stop_event.set()
         scanner.join(timeout=2)
+        plt.close(fig)
 
 if __name__ == '__main__':
     main()
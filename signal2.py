@@ -98,6 +98,7 @@ history_rssi = defaultdict(lambda: deque(maxlen=MAX_POINTS))
 history_snr = defaultdict(lambda: deque(maxlen=MAX_POINTS))
 history_srri = defaultdict(lambda: deque(maxlen=MAX_POINTS))
 time_axis = deque(maxlen=MAX_POINTS)
+_known_ssids = set()   # kaikki tähän mennessä nähdyt SSID:t (ei kopioida historyn avaimia joka kierroksella)
 _lock = threading.Lock()
 
 def dbm_to_snr(dbm):
@@ -123,11 +124,11 @@ def scanner_thread(stop_event):
                 history_snr[ssid].append(snr)
                 history_srri[ssid].append(srri)
                 seen.add(ssid)
-            for s in list(history_rssi.keys()):
-                if s not in seen:
-                    history_rssi[s].append(np.nan)
-                    history_snr[s].append(np.nan)
-                    history_srri[s].append(np.nan)
+            _known_ssids.update(seen)
+            for s in _known_ssids - seen:
+                history_rssi[s].append(np.nan)
+                history_snr[s].append(np.nan)
+                history_srri[s].append(np.nan)
         time.sleep(UPDATE_INTERVAL_MS / 1000.0)
 
 # --- Piirto ---
@@ -173,7 +174,9 @@ def main():
     stop_event = threading.Event()
     thread = threading.Thread(target=scanner_thread, args=(stop_event,), daemon=True)
     thread.start()
-    ani = animation.FuncAnimation(fig, update_plot, interval=UPDATE_INTERVAL_MS)
+    # ei kehysvälimuistia: monitori pyörii tunteja eikä kehyksiä tallenneta
+    ani = animation.FuncAnimation(fig, update_plot, interval=UPDATE_INTERVAL_MS,
+                                  cache_frame_data=False, save_count=0)
     try:
         plt.show()
     except KeyboardInterrupt:
@@ -181,6 +184,7 @@ def main():
     finally:
         stop_event.set()
         thread.join(timeout=2)
+        plt.close(fig)
 
 if __name__ == "__main__":
     main()
@@ -1,84 +1,154 @@
 #!/usr/bin/env python3
+import os
+import sys
+import errno
+import importlib
 import time
+import math
 import threading
 import subprocess
 import platform
-import re
-from collections import defaultdict, deque
 import numpy as np
+# nmcli/netsh-parserit (ja kanavataulukko) ovat yhteiset wifi.py:n kanssa
+from wifi_parse import parse_nmcli, parse_netsh
+import matplotlib
+# Taustajärjestelmä valitaan ennen pyplotia: MPL_BACKEND voittaa jos asetettu, muuten Qt
+# (piirtää live-kuvaajat paljon nopeammin kuin Tk). Ilman näyttöä (Linux) tai ilman Qt:ta
+# käytetään matplotlibin oletusta (macosx, GTK, ...).
+if not os.environ.get('MPL_BACKEND') and (sys.platform != 'linux' or os.environ.get('DISPLAY')
+                                          or os.environ.get('WAYLAND_DISPLAY')):
+    for _backend in ('QtAgg', 'Qt5Agg'):
+        try:
+            importlib.import_module('matplotlib.backends.backend_' + _backend.lower())
+        except Exception:
+            continue
+        matplotlib.use(_backend)
+        break
 import matplotlib.pyplot as plt
 import matplotlib.animation as animation
+if plt.get_backend().lower() == 'tkagg':
+    print("Varoitus: TkAgg nykii neljän kuvaajan päivityksissä; asenna PyQt5/PyQt6 sujuvampaa piirtoa varten",
+          file=sys.stderr)
+
+# --- NetworkManager D-Busin yli (pydbus), nmcli jää varalle ---
+NM = 'org.freedesktop.NetworkManager'
+NM_DEVICE_TYPE_WIFI = 2
+_nm_bus = None
+_nm_aps = {}   # AccessPoint-polku -> proxy, ettei introspektoida joka skannauksella
+
+def _nm_wifi_device():
+    global _nm_bus
+    try:
+        from pydbus import SystemBus
+        _nm_bus = SystemBus()
+        for path in _nm_bus.get(NM).GetDevices():
+            dev = _nm_bus.get(NM, path)
+            if dev.DeviceType == NM_DEVICE_TYPE_WIFI:
+                return dev
+    except Exception:
+        pass
+    return None
 
-# --- Kanava -> taajuus (MHz) ---
-def channel_to_freq_mhz(channel):
+_nm_wifi = _nm_wifi_device() if 'linux' in platform.system().lower() else None
+
+# Uusi skannaus pyydetään vasta kun edellinen on tätä vanhempi (sama kuin nmcli:n --rescan auto).
+# Lyhyempi väli tarkoittaisi lähes jatkuvaa kanavien ulkopuolista skannausta yhdistetyllä liitännällä.
+NM_RESCAN_AGE_S = 30.0
+_nm_scan_warned = False
+
+def _nm_request_scan():
+    # NM päivittää AP-listansa itse vain parin minuutin välein; pyydetään uusi skannaus, ellei
+    # edellinen (LastScan, ms CLOCK_BOOTTIME:ssa, NM >= 1.12) ole tuoreempi kuin NM_RESCAN_AGE_S
+    global _nm_scan_warned
     try:
-        ch = int(channel)
+        last = _nm_wifi.LastScan
     except Exception:
-        return None
-    if 1 <= ch <= 14:
-        return 2407 + 5 * ch
-    table = {
-        36: 5180, 40: 5200, 44: 5220, 48: 5240,
-        52: 5260, 56:5280, 60:5300, 64:5320,
-        100:5500,104:5520,108:5540,112:5560,116:5580,120:5600,124:5620,128:5640,
-        132:5660,136:5680,140:5700,144:5720,
-        149:5745,153:5765,157:5785,161:5805,165:5825
-    }
-    return table.get(ch)
-
-# --- Parsinta ---
-def parse_nmcli(output):
+        last = -1
+    if last >= 0 and time.clock_gettime(time.CLOCK_BOOTTIME) * 1000.0 - last < NM_RESCAN_AGE_S * 1000.0:
+        return
+    try:
+        _nm_wifi.RequestScan({})
+    except Exception as e:
+        # paras yritys: NotAllowed (skannaus käynnissä) tai PermissionDenied (polkit, esim. SSH)
+        # eivät estä lukemasta jo tunnettuja AP:ita
+        if not _nm_scan_warned and 'NotAllowed' not in str(e):
+            print("Varoitus: NetworkManager ei salli skannausta ({}); käytetään sen omia tuloksia".format(e),
+                  file=sys.stderr)
+            _nm_scan_warned = True
+
+def scan_nm_dbus():
+    # Strength on valmiiksi 0-100 ja Frequency MHz:nä, ei tekstin parsintaa
+    _nm_request_scan()
+    paths = _nm_wifi.GetAccessPoints()
     networks = []
-    lines = output.strip().splitlines()
-    for line in lines:
-        if not line.strip():
-            continue
-        parts = [p.strip() for p in re.split(r'\s{2,}', line) if p.strip()]
-        if not parts or parts[0].lower().startswith('ssid'):
-            continue
-        ssid = parts[0]
-        chan = None
-        sig = None
-        for token in parts[1:]:
-            if re.match(r'^\d+$', token):
-                chan = token
-            m = re.search(r'(\d+)$', token)
-            if m and (token.endswith('%') or int(m.group(1)) <= 100):
-                sig = float(m.group(1))
-        freq = channel_to_freq_mhz(int(chan)) if chan else None
-        dbm = (sig / 100.0) * 50.0 - 100.0 if sig is not None else None
-        networks.append({'ssid': ssid or '<hidden>', 'freq_mhz': freq, 'dbm': dbm})
+    for path in paths:
+        ap = _nm_aps.get(path)
+        if ap is None:
+            ap = _nm_aps[path] = _nm_bus.get(NM, path)
+        ssid = bytes(ap.Ssid).decode('utf-8', 'replace')
+        networks.append({'ssid': ssid or '<hidden>', 'freq_mhz': ap.Frequency,
+                         'dbm': (ap.Strength / 100.0) * 50.0 - 100.0})
+    for path in _nm_aps.keys() - set(paths):
+        del _nm_aps[path]
     return networks
 
-def parse_netsh(output):
+# --- nl80211 netlinkin yli (pyroute2): ei aliprosessia skannausta kohden ---
+# Skannauksen käynnistys vaatii root-oikeudet (CAP_NET_ADMIN); ilman niitä nmcli hoitaa.
+def _iw_open():
+    try:
+        from pyroute2 import IW
+        iw = IW()
+        for msg in iw.get_interfaces_dump():
+            return iw, msg.get_attr('NL80211_ATTR_IFINDEX')
+        iw.close()
+    except Exception:
+        pass
+    return None, None
+
+_iw, _iw_index = _iw_open() if 'linux' in platform.system().lower() else (None, None)
+
+def scan_iw_netlink():
     networks = []
-    ssid_blocks = re.split(r'\r?\n\s*SSID\s+\d+\s*:\s*', output)
-    for blk in ssid_blocks[1:]:
-        lines = blk.splitlines()
-        if not lines:
+    for msg in _iw.scan(_iw_index, flush_cache=True):
+        bss = msg.get_attr('NL80211_ATTR_BSS')
+        if bss is None:
             continue
-        ssid = lines[0].strip() or '<hidden>'
-        channel = None
-        dbm = None
-        for L in lines[1:]:
-            mchan = re.search(r'Channel\s*:\s*(\d+)', L)
-            if mchan:
-                channel = int(mchan.group(1))
-            msignal = re.search(r'Signal\s*:\s*([0-9]+)%', L)
-            if msignal:
-                pct = int(msignal.group(1))
-                dbm = (pct / 100.0) * 50.0 - 100.0
-        freq = channel_to_freq_mhz(channel) if channel else None
-        networks.append({'ssid': ssid, 'freq_mhz': freq, 'dbm': dbm})
+        ies = bss.get_attr('NL80211_BSS_INFORMATION_ELEMENTS') or {}
+        ssid = ies.get('SSID') or ''
+        if isinstance(ssid, bytes):
+            ssid = ssid.decode('utf-8', 'replace')
+        # pyroute2 purkaa signaalin dictiksi: {'VALUE': mBm, 'SIGNAL_STRENGTH': {'VALUE': dBm, ...}}
+        mbm = bss.get_attr('NL80211_BSS_SIGNAL_MBM')
+        if isinstance(mbm, dict):
+            dbm = float(mbm.get('SIGNAL_STRENGTH', {}).get('VALUE', mbm['VALUE'] / 100.0))
+        else:
+            dbm = None if mbm is None else mbm / 100.0
+        networks.append({'ssid': ssid or '<hidden>', 'freq_mhz': bss.get_attr('NL80211_BSS_FREQUENCY'),
+                         'dbm': dbm})
     return networks
 
 # --- Skanneri ---
 def scan_wifi():
+    global _iw
     osn = platform.system().lower()
     try:
         if 'linux' in osn:
+            if _nm_wifi is not None:
+                try:
+                    return scan_nm_dbus()
+                except Exception:
+                    pass   # NetworkManager ei vastaa -> netlink / nmcli
+            if _iw is not None:
+                try:
+                    return scan_iw_netlink()
+                except Exception as e:
+                    # ilman oikeuksia (EPERM) ei yritetä joka kierroksella uudelleen; muut virheet
+                    # (esim. laite kiireinen) -> tämä kierros nmcli:llä
+                    if isinstance(e, PermissionError) or getattr(e, 'code', None) == errno.EPERM:
+                        _iw.close()
+                        _iw = None
             out = subprocess.check_output(
-                ['nmcli', '-f', 'SSID,CHAN,SIGNAL', 'device', 'wifi', 'list'],
+                ['nmcli', '-t', '-e', 'no', '-f', 'SSID,CHAN,SIGNAL', 'device', 'wifi', 'list'],
                 stderr=subprocess.DEVNULL, universal_newlines=True, timeout=6)
             return parse_nmcli(out)
         elif 'windows' in osn:
@@ -92,102 +162,195 @@ def scan_wifi():
 
 # --- Mittausdata ---
 MAX_POINTS = 60
+TOP_N = 8
 UPDATE_INTERVAL_MS = 2000
+PLOT_SKIP = 1   # piirrä vasta joka N:nnen skannauksen jälkeen
+# Mukautuva skannausväli: kun verkot ja niiden tasot (CHURN_DB:n tarkkuudella) pysyvät samoina
+# STEADY_SCANS kierrosta, väli tuplataan aina SCAN_INTERVAL_MAX_S:ään asti; muutos palauttaa perusvälin.
+SCAN_INTERVAL_MAX_S = 30.0
+STEADY_SCANS = 3
+CHURN_DB = 5.0
 
-history_rssi = defaultdict(lambda: deque(maxlen=MAX_POINTS))
-history_snr = defaultdict(lambda: deque(maxlen=MAX_POINTS))
-history_srri = defaultdict(lambda: deque(maxlen=MAX_POINTS))
-history_freq = defaultdict(lambda: deque(maxlen=MAX_POINTS))
-time_axis = deque(maxlen=MAX_POINTS)
+# _hist[idx, col] = (rssi, snr, srri, freq) of SSID `idx` at scan `col`; columns form a
+# ring buffer (_head = next column to write = oldest sample). Rows are doubled when more
+# SSIDs show up than fit. Values are stored quantized (5 bytes per sample instead of 16):
+# whole dBm as int8, SNR/SRRI as uint8, MHz as uint16; _EMPTY holds the per-field
+# sentinels that mean "not seen" and become NaN only when plotted.
+_REC = np.dtype([('rssi', 'i1'), ('snr', 'u1'), ('srri', 'u1'), ('freq', 'u2')])
+_EMPTY = np.array((-128, 255, 255, 0), dtype=_REC)
+_FIELDS = [(name, _EMPTY[name]) for name in _REC.names]
+_hist = np.full((16, MAX_POINTS), _EMPTY, dtype=_REC)
+_times = np.full(MAX_POINTS, np.nan)
+# _chrono[h] = rengaspuskurin sarakkeet vanhimmasta uusimpaan, kun _head == h
+_chrono = (np.arange(MAX_POINTS) + np.arange(MAX_POINTS)[:, None]) % MAX_POINTS
+_ssid_idx = {}
+_ssid_of_row = []
+# RSSI-maksimi per rivi ikkunan yli (-128 = ei näytteitä, pienin int8 joten np.maximum toimii
+# sellaisenaan); ylläpidetään skannerissa
+_rssi_max = np.full(16, _EMPTY['rssi'], dtype=np.int8)
+_head = 0
+_new_scans = 0   # skannauksia edellisen piirron jälkeen
 _lock = threading.Lock()
 
+# koko skannaus kerralla numpy-taulukkona; puuttuva dBm (NaN) -> SNR 0
 def dbm_to_snr(dbm):
-    return max(0.0, dbm + 100.0) if dbm is not None else 0.0
+    return np.fmax(dbm + 100.0, 0.0)
 
 def snr_to_srri(snr):
-    return max(0.0, min(100.0, (snr / 70.0) * 100.0))
+    return np.clip(snr * (100.0 / 70.0), 0.0, 100.0)
+
+def _quantize(x, missing, lo, hi):
+    return np.where(np.isnan(x), missing, np.clip(np.rint(x), lo, hi))
 
 def scanner_thread(stop_event):
+    global _hist, _rssi_max, _head, _new_scans
+    interval = UPDATE_INTERVAL_MS / 1000.0
+    last_sig = None
+    steady = 0
     while not stop_event.is_set():
         nets = scan_wifi()
         t = time.time()
+        ssids = [net.get('ssid') or '<hidden>' for net in nets]
+        rows = np.empty((len(nets), 4), dtype=np.float32)
+        rows[:, 0] = [net.get('dbm', -100.0) for net in nets]  # None -> NaN
+        rows[:, 1] = dbm_to_snr(rows[:, 0])
+        rows[:, 2] = snr_to_srri(rows[:, 1])
+        rows[:, 3] = [net.get('freq_mhz', np.nan) for net in nets]
+        rec = np.empty(len(nets), dtype=_REC)
+        rec['rssi'] = _quantize(rows[:, 0], _EMPTY['rssi'], -127, 127)
+        rec['snr'] = _quantize(rows[:, 1], _EMPTY['snr'], 0, 254)
+        rec['srri'] = _quantize(rows[:, 2], _EMPTY['srri'], 0, 254)
+        rec['freq'] = _quantize(rows[:, 3], _EMPTY['freq'], 1, 65535)
         with _lock:
-            if not time_axis or (t - (time_axis[-1] if time_axis else 0) >= 1.0):
-                time_axis.append(t)
-            seen = set()
-            for net in nets:
-                ssid = net.get('ssid') or '<hidden>'
-                dbm = net.get('dbm', -100.0)
-                freq = net.get('freq_mhz', np.nan)
-                snr = dbm_to_snr(dbm)
-                srri = snr_to_srri(snr)
-                history_rssi[ssid].append(dbm)
-                history_snr[ssid].append(snr)
-                history_srri[ssid].append(srri)
-                history_freq[ssid].append(freq)
-                seen.add(ssid)
-            for s in list(history_rssi.keys()):
-                if s not in seen:
-                    history_rssi[s].append(np.nan)
-                    history_snr[s].append(np.nan)
-                    history_srri[s].append(np.nan)
-                    history_freq[s].append(np.nan)
-        time.sleep(UPDATE_INTERVAL_MS / 1000.0)
+            idxs = []
+            for ssid in ssids:
+                idx = _ssid_idx.get(ssid)
+                if idx is None:
+                    idx = len(_ssid_idx)
+                    if idx == _hist.shape[0]:
+                        _hist = np.concatenate([_hist, np.full_like(_hist, _EMPTY)])
+                        _rssi_max = np.concatenate([_rssi_max, np.full_like(_rssi_max, _EMPTY['rssi'])])
+                    _ssid_idx[ssid] = idx
+                    _ssid_of_row.append(ssid)
+                idxs.append(idx)
+            _times[_head] = t
+            n = len(_ssid_idx)
+            dropped = _hist['rssi'][:n, _head].copy()   # vanhimmat näytteet, jotka nyt ylikirjoitetaan
+            # tyhjennä sarake yhdellä kirjoituksella: tällä kierroksella näkymättömät jäävät tyhjiksi
+            _hist[:n, _head] = _EMPTY
+            _hist[idxs, _head] = rec
+            # maksimi inkrementaalisesti; koko rivi lasketaan uudelleen vain jos ikkunasta poistui sen maksimi
+            mx = _rssi_max[:n]
+            np.maximum(mx, _hist['rssi'][:n, _head], out=mx)
+            stale = np.flatnonzero(dropped == mx)
+            if stale.size:
+                _rssi_max[stale] = _hist['rssi'][stale].max(axis=1)
+            _head = (_head + 1) % MAX_POINTS
+            _new_scans += 1
+        # tilanteen sormenjälki: SSID:t ja tasot karkeasti pyöristettynä (puuttuva dBm -> -999)
+        levels = np.nan_to_num(np.round(rows[:, 0] / CHURN_DB), nan=-999.0).tolist()
+        sig = hash(tuple(sorted(zip(ssids, levels))))
+        if sig == last_sig:
+            steady += 1
+            if steady >= STEADY_SCANS:
+                interval = min(interval * 2.0, SCAN_INTERVAL_MAX_S)
+                steady = 0
+        else:
+            interval = UPDATE_INTERVAL_MS / 1000.0
+            steady = 0
+        last_sig = sig
+        # wait() eikä sleep(): pitkänkin välin aikana sulkeutuminen on välitön
+        stop_event.wait(interval)
 
 # --- Piirto ---
 fig, axes = plt.subplots(4, 1, figsize=(12, 14))
 plt.subplots_adjust(hspace=0.4)
 colors = plt.rcParams['axes.prop_cycle'].by_key()['color']
+# pysyvät artistit (blittaus vaatii): TOP_N viivaa per akseli + SSID-nimet ylimpään kuvaajaan
+_lines = [[] for _ in axes]
+_labels = []
+
+def _setup_axes():
+    # kaikki staattinen kerran; blittaus pitää taustan välimuistissa
+    titles = [
+        "RSSI (Received Signal Strength, dBm)",
+        "SNR (Signal-to-Noise Ratio, dB)",
+        "SRRI (Scaled SNR, 0–100)",
+        "Taajuus (MHz)"
+    ]
+    ylabels = ["dBm", "dB", "SRRI (0–100)", "MHz"]
+    ylims = [(-110, -30), (0, 70), (0, 100), (2400, 5900)]
+    for ax, t, yl, lim in zip(axes, titles, ylabels, ylims):
+        ax.set_title(t)
+        ax.set_ylabel(yl)
+        ax.set_ylim(*lim)
+        ax.grid(True, alpha=0.3)
+    axes[-1].set_xlabel("Aika (s, viimeiset ~60)")
+    for i in range(TOP_N):
+        c = colors[i % len(colors)]
+        for ax, lines in zip(axes, _lines):
+            lines.append(ax.plot([], [], color=c, visible=False)[0])
+        # legenda tekstiartisteina; ax.legend() ei blittaudu
+        _labels.append(axes[0].text(0.01, 0.97 - i * 0.09, '', transform=axes[0].transAxes,
+                                    color=c, fontsize='small', va='top'))
+
+_setup_axes()
+_artists = [l for lines in _lines for l in lines] + _labels
+
+def init_plot():
+    return _artists
 
 def update_plot(frame):
+    global _new_scans
     with _lock:
-        if not time_axis:
-            return
-        times = np.array(time_axis)
+        # ei uutta dataa (tai alle PLOT_SKIP skannausta): palautetaan artistit sellaisenaan
+        if _new_scans < PLOT_SKIP or not _ssid_idx:
+            return _artists
+        _new_scans = 0
+        times = _times[_chrono[_head]]
         rel_time = times - times[-1]
-        for ax in axes:
-            ax.clear()
-            ax.grid(True, alpha=0.3)
-
-        titles = [
-            "RSSI (Received Signal Strength, dBm)",
-            "SNR (Signal-to-Noise Ratio, dB)",
-            "SRRI (Scaled SNR, 0–100)",
-            "Taajuus (MHz)"
-        ]
-        ylabels = ["dBm", "dB", "SRRI (0–100)", "MHz"]
-        for ax, t, yl in zip(axes, titles, ylabels):
-            ax.set_title(t)
-            ax.set_ylabel(yl)
-        axes[-1].set_xlabel("Aika (s, viimeiset ~60)")
-
-        ssids = sorted(history_rssi.keys(), key=lambda s: np.nanmax(np.array(history_rssi[s])) if history_rssi[s] else -999)
-        top_ssids = ssids[:8]
-
-        for i, ssid in enumerate(top_ssids):
-            c = colors[i % len(colors)]
-            rssi = np.array(history_rssi[ssid])
-            snr = np.array(history_snr[ssid])
-            srri = np.array(history_srri[ssid])
-            freq = np.array(history_freq[ssid])
-            axes[0].plot(rel_time, rssi, color=c, label=ssid)
-            axes[1].plot(rel_time, snr, color=c, label=ssid)
-            axes[2].plot(rel_time, srri, color=c, label=ssid)
-            axes[3].plot(rel_time, freq, color=c, label=ssid)
-
-        axes[0].set_ylim(-110, -30)
-        axes[1].set_ylim(0, 70)
-        axes[2].set_ylim(0, 100)
-        axes[3].set_ylim(2400, 5900)
 
+        n = len(_ssid_idx)
+        maxes = _rssi_max[:n].astype(np.int16)   # int8:n -(-128) vuotaisi yli
+        # TOP_N vahvinta: O(n) valinta, sitten vain ne järjestykseen (vahvin ensin)
+        top = np.argpartition(-maxes, TOP_N)[:TOP_N] if n > TOP_N else np.arange(n)
+        top = top[np.argsort(-maxes[top], kind='stable')]
+
+        # valittujen SSID:iden koko tietue (kaikki 4 mittaria) aikajärjestyksessä yhdellä haulla
+        Y = _hist[top[:, None], _chrono[_head]]
+        names = [_ssid_of_row[r] for r in top]
+    # float vasta piirtoa varten: tyhjät näytteet -> NaN (aukko viivassa)
+    series = []
+    for name, missing in _FIELDS:
+        q = Y[name]
+        v = q.astype(np.float32)
+        v[q == missing] = np.nan
+        series.append(v)
+
+    for i in range(TOP_N):
+        if i < len(names):
+            for v, lines in zip(series, _lines):
+                lines[i].set_data(rel_time, v[i])
+                lines[i].set_visible(True)
+            _labels[i].set_text(names[i])
+        else:
+            for lines in _lines:
+                lines[i].set_visible(False)
+            _labels[i].set_text('')
+    # x-alue 10 s askelin; rajat (ja välimuistissa oleva tausta) päivitetään vain kun alue kasvaa
+    left = min(-10.0, -10.0 * math.ceil(-np.nanmin(rel_time) / 10.0))
+    if axes[0].get_xlim()[0] != left:
         for ax in axes:
-            ax.legend(loc="upper left", fontsize="small")
+            ax.set_xlim(left, 0.5)
+        fig.canvas.draw()
+    return _artists
 
 def main():
     stop_event = threading.Event()
     thread = threading.Thread(target=scanner_thread, args=(stop_event,), daemon=True)
     thread.start()
-    ani = animation.FuncAnimation(fig, update_plot, interval=UPDATE_INTERVAL_MS)
+    ani = animation.FuncAnimation(fig, update_plot, init_func=init_plot, interval=UPDATE_INTERVAL_MS,
+                                  blit=True, cache_frame_data=False, save_count=0)
     try:
         plt.show()
     except KeyboardInterrupt:
@@ -195,6 +358,7 @@ def main():
     finally:
         stop_event.set()
         thread.join(timeout=2)
+        plt.close(fig)
 
 if __name__ == "__main__":
     main()
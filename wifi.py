@@ -9,48 +9,47 @@ import math
 import matplotlib.pyplot as plt
 import numpy as np
 
-# ---------- Utility: channel <-> frequency helpers ----------
-# 2.4 GHz channels 1-14
-def channel_to_freq_mhz(channel):
-    # channel may be int or string like "36"
-    try:
-        ch = int(channel)
-    except Exception:
-        return None
-    # 2.4 GHz
-    if 1 <= ch <= 14:
-        # Channel 1 -> 2412 MHz, channel n -> 2407 + 5*n
-        return 2407 + 5 * ch
-    # 5 GHz common channels (approx)
-    # formula not continuous; use table for common channels:
-    table = {
-        36: 5180, 40: 5200, 44: 5220, 48: 5240,
-        52: 5260, 56:5280, 60:5300, 64:5320,
-        100:5500,104:5520,108:5540,112:5560,116:5580,120:5600,124:5620,128:5640,
-        132:5660,136:5680,140:5700,144:5720,
-        149:5745,153:5765,157:5785,161:5805,165:5825
-    }
-    return table.get(ch)
+# channel table and the nmcli/netsh parsers are shared with signal3.py
+from wifi_parse import channel_to_freq_mhz, parse_nmcli, parse_netsh
+
+# ---------- Precompiled patterns (parsers run them once per line/cell) ----------
+_RE_MHZ = re.compile(r'([0-9]+(?:\.[0-9]+)?)\s*MHz', re.I)
+_RE_GHZ = re.compile(r'([0-9]+(?:\.[0-9]+)?)\s*GHz', re.I)
+_RE_CHANNEL_WORD = re.compile(r'channel[:=\s]*([0-9]+)', re.I)
+_RE_LONE_NUM = re.compile(r'\b([0-9]{2,4})\b')
+_RE_CELL = re.compile(r'Cell \d+ - ')
+# all iwlist cell fields in one alternation, dispatched on m.lastgroup
+_RE_IWLIST_FIELDS = re.compile(
+    r'ESSID:"(?P<ssid>[^"]*)"'
+    r'|Frequency:(?P<ghz>[0-9.]+)\s*GHz'
+    r'|Signal level[=\:]\s*(?P<dbm>[-\d]+)\s*dBm'
+    r'|Channel[:=]?\s*(?P<ch>[0-9]+)'
+    r'|(?P<mhz>[0-9]{3,4})\s*MHz')
+_RE_COLS = re.compile(r'\s{2,}')
+_RE_AIRPORT_CH = re.compile(r'^\d{1,3}(?:,.*)?$')
+_RE_AIRPORT_RSSI = re.compile(r'^-?\d+\s*$')
+_RE_IWCONFIG_IFACE = re.compile(r'([a-zA-Z0-9]+)\s+IEEE 802.11')
 
+# ---------- Utility: channel <-> frequency helpers ----------
 def freq_string_to_mhz(s):
     """Parse strings like '2.462 GHz' or '2462 MHz' or 'Channel 6'."""
     if s is None:
         return None
     s = s.strip()
     # MHz
-    m = re.search(r'([0-9]+(?:\.[0-9]+)?)\s*MHz', s, re.I)
+    m = _RE_MHZ.search(s)
     if m:
         return float(m.group(1))
     # GHz
-    m = re.search(r'([0-9]+(?:\.[0-9]+)?)\s*GHz', s, re.I)
+    m = _RE_GHZ.search(s)
     if m:
         return float(m.group(1)) * 1000.0
     # channel
-    m = re.search(r'channel[:=\s]*([0-9]+)', s, re.I)
+    m = _RE_CHANNEL_WORD.search(s)
     if m:
         return channel_to_freq_mhz(m.group(1))
     # lone number, could be channel or mhz
-    m = re.search(r'\b([0-9]{2,4})\b', s)
+    m = _RE_LONE_NUM.search(s)
     if m:
         val = int(m.group(1))
         if val < 300:  # treat as channel
@@ -62,90 +61,38 @@ def freq_string_to_mhz(s):
 # ---------- Parsers for platform-specific scan outputs ----------
 def parse_iwlist(output):
     # Linux: iwlist scan
-    # look for Frequency:X.XXX GHz and ESSID and Quality
+    # look for Frequency:X.XXX GHz and ESSID and Signal level, one finditer pass per cell
     networks = []
-    cells = re.split(r'Cell \d+ - ', output)
+    cells = _RE_CELL.split(output)
     for c in cells:
         if not c.strip():
             continue
-        ssid_m = re.search(r'ESSID:"([^"]*)"', c)
-        freq_m = re.search(r'Frequency:([0-9.]+)\s*GHz', c)
-        qual_m = re.search(r'Quality[=\:]\s*([0-9/]+)', c) or re.search(r'Signal level[=\:]\s*([-\d]+) dBm', c)
-        ch_m = re.search(r'Channel[:=]?\s*([0-9]+)', c)
-        ssid = ssid_m.group(1) if ssid_m else None
-        freq = None
-        if freq_m:
-            freq = float(freq_m.group(1)) * 1000.0
-        elif ch_m:
-            freq = channel_to_freq_mhz(int(ch_m.group(1)))
-        elif ssid:
-            # fallback: search any MHz/MHz-like token
-            f = re.search(r'([0-9]{3,4})\s*MHz', c)
-            if f:
-                freq = float(f.group(1))
-        # parse dBm if present
-        dbm = None
-        dbm_m = re.search(r'Signal level[=\:]\s*([-\d]+)\s*dBm', c)
-        if dbm_m:
-            dbm = float(dbm_m.group(1))
-        networks.append({'ssid': ssid, 'freq_mhz': freq, 'dbm': dbm})
-    return networks
-
-def parse_nmcli(output):
-    # nmcli -f SSID,CHAN,SIGNAL dev wifi
-    networks = []
-    lines = output.strip().splitlines()
-    # skip header if present
-    for line in lines:
-        if not line.strip():
-            continue
-        # naive split: last columns are CHAN and SIGNAL
-        parts = [p.strip() for p in re.split(r'\s{2,}', line)]
-        # Try to detect if header exists
-        if parts[0].lower().startswith('ssid') or parts[0].lower().startswith('in-use'):
-            continue
-        ssid = parts[0]
-        chan = None
-        sig = None
-        if len(parts) >= 2:
-            # find channel token anywhere
-            for token in parts[1:]:
-                if re.match(r'^\d+$', token):
-                    chan = token
-                    break
-        if len(parts) >= 3:
-            # try last as signal %
-            last = parts[-1]
-            m = re.search(r'(\d+)', last)
-            if m:
-                sig = float(m.group(1))
-        freq = channel_to_freq_mhz(int(chan)) if chan and chan.isdigit() else None
-        networks.append({'ssid': ssid, 'freq_mhz': freq, 'dbm': None if sig is None else (sig-100)})  # approximate dBm
-    return networks
-
-def parse_netsh(output):
-    # Windows: netsh wlan show networks mode=bssid
-    networks = []
-    # sections separated by "SSID X : name"
-    ssid_blocks = re.split(r'\r?\n\s*SSID\s+\d+\s*:\s*', output)
-    # first block is header
-    for blk in ssid_blocks[1:]:
-        lines = blk.splitlines()
-        ssid = lines[0].strip()
+        # first occurrence of each field wins
+        ssid = ghz = ch = mhz = dbm = None
+        for m in _RE_IWLIST_FIELDS.finditer(c):
+            kind = m.lastgroup
+            if kind == 'ssid':
+                if ssid is None:
+                    ssid = m.group('ssid')
+            elif kind == 'ghz':
+                if ghz is None:
+                    ghz = m.group('ghz')
+            elif kind == 'dbm':
+                if dbm is None:
+                    dbm = float(m.group('dbm'))
+            elif kind == 'ch':
+                if ch is None:
+                    ch = m.group('ch')
+            elif mhz is None:
+                mhz = m.group('mhz')
         freq = None
-        dbm = None
-        channel = None
-        # search in block
-        for L in lines[1:]:
-            mchan = re.search(r'Channel\s*:\s*(\d+)', L)
-            if mchan:
-                channel = int(mchan.group(1))
-            msignal = re.search(r'Signal\s*:\s*([0-9]+)%', L)
-            if msignal:
-                # convert % to approximate dBm (very rough)
-                pct = int(msignal.group(1))
-                dbm = (pct / 2) - 100  # rough map 0%->-100,100%->-50
-        freq = channel_to_freq_mhz(channel) if channel else None
+        if ghz:
+            freq = float(ghz) * 1000.0
+        elif ch:
+            freq = channel_to_freq_mhz(int(ch))
+        elif ssid and mhz:
+            # fallback: any MHz-like token
+            freq = float(mhz)
         networks.append({'ssid': ssid, 'freq_mhz': freq, 'dbm': dbm})
     return networks
 
@@ -162,14 +109,14 @@ def parse_airport(output):
     for line in lines[1:]:
         if not line.strip():
             continue
-        parts = re.split(r'\s{2,}', line.strip())
+        parts = _RE_COLS.split(line.strip())
         if len(parts) >= 3:
             ssid = parts[0]
             rssi = None
             ch = None
             # find channel token like "11" or "6,1"
             for token in parts:
-                if re.match(r'^\d{1,3}(?:,.*)?$', token):
+                if _RE_AIRPORT_CH.match(token):
                     # token could be "11" or "36" or "36,1"
                     chtok = token.split(',')[0]
                     if chtok.isdigit():
@@ -177,7 +124,7 @@ def parse_airport(output):
                         break
             # RSSI likely available as negative dBm in parts
             for token in parts:
-                if re.match(r'^-?\d+\s*$', token):
+                if _RE_AIRPORT_RSSI.match(token):
                     val = int(token.strip())
                     # RSSI typical range -100..0
                     if -120 < val < 0:
@@ -191,7 +138,7 @@ def parse_airport(output):
 def scan_linux():
     # Try nmcli first (more common on modern distros)
     try:
-        out = subprocess.check_output(['nmcli', '-f', 'SSID,CHAN,SIGNAL', 'device', 'wifi', 'list'],
+        out = subprocess.check_output(['nmcli', '-t', '-e', 'no', '-f', 'SSID,CHAN,SIGNAL', 'device', 'wifi', 'list'],
                                       stderr=subprocess.DEVNULL, universal_newlines=True)
         parsed = parse_nmcli(out)
         if parsed:
@@ -202,7 +149,7 @@ def scan_linux():
     try:
         # find wireless interface
         iwconfig_out = subprocess.check_output(['iwconfig'], stderr=subprocess.DEVNULL, universal_newlines=True)
-        m = re.search(r'([a-zA-Z0-9]+)\s+IEEE 802.11', iwconfig_out)
+        m = _RE_IWCONFIG_IFACE.search(iwconfig_out)
         iface = m.group(1) if m else 'wlan0'
         out = subprocess.check_output(['sudo', 'iwlist', iface, 'scan'], stderr=subprocess.DEVNULL, universal_newlines=True)
         return parse_iwlist(out)
@@ -0,0 +1,69 @@
+# Shared scan-output parsers for signal3.py and wifi.py.
+# Networks are dicts {'ssid', 'freq_mhz', 'dbm'}; signal percent maps to dBm as 0% -> -100, 100% -> -50.
+import re
+import numpy as np
+
+_RE_NETSH_BLOCK = re.compile(r'\r?\n\s*SSID\s+\d+\s*:\s*')
+_RE_NETSH_FIELDS = re.compile(r'Channel\s*:\s*(?P<chan>\d+)|Signal\s*:\s*(?P<sig>[0-9]+)%')
+
+# ---------- Channel -> frequency (MHz) ----------
+# Built once at import: index = channel number, value = centre frequency in MHz, -1 = unknown.
+# 2.4 GHz channels 1-14 (channel n -> 2407 + 5*n); 5 GHz common channels from the table.
+_FREQ_LUT = np.full(256, -1, dtype=np.int16)
+_FREQ_LUT[1:15] = 2407 + 5 * np.arange(1, 15)
+for _ch, _f in {
+        36: 5180, 40: 5200, 44: 5220, 48: 5240,
+        52: 5260, 56:5280, 60:5300, 64:5320,
+        100:5500,104:5520,108:5540,112:5560,116:5580,120:5600,124:5620,128:5640,
+        132:5660,136:5680,140:5700,144:5720,
+        149:5745,153:5765,157:5785,161:5805,165:5825}.items():
+    _FREQ_LUT[_ch] = _f
+
+def channel_to_freq_mhz(channel):
+    # channel may be int or string like "36"
+    try:
+        ch = int(channel)
+    except Exception:
+        return None
+    if not 0 <= ch < 256:
+        return None
+    v = _FREQ_LUT[ch]
+    return None if v < 0 else int(v)
+
+# ---------- Parsers ----------
+def parse_nmcli(output):
+    # nmcli -t -e no -f SSID,CHAN,SIGNAL: one "SSID:CHAN:SIGNAL" record per line, signal in percent
+    networks = []
+    for line in output.splitlines():
+        # CHAN and SIGNAL never contain ':', so split from the right (the SSID may)
+        parts = line.rsplit(':', 2)
+        if len(parts) != 3:
+            continue
+        ssid, chan, sig = parts
+        freq = channel_to_freq_mhz(chan) if chan.isdigit() else None
+        dbm = (int(sig) / 100.0) * 50.0 - 100.0 if sig.isdigit() else None
+        networks.append({'ssid': ssid or '<hidden>', 'freq_mhz': freq, 'dbm': dbm})
+    return networks
+
+def parse_netsh(output):
+    # Windows: netsh wlan show networks mode=bssid, sections separated by "SSID X : name"
+    networks = []
+    ssid_blocks = _RE_NETSH_BLOCK.split(output)
+    # first block is header
+    for blk in ssid_blocks[1:]:
+        if not blk:
+            continue
+        ssid, _, body = blk.partition('\n')
+        ssid = ssid.strip() or '<hidden>'
+        channel = None
+        dbm = None
+        # one pass over the block; the last Channel/Signal seen wins
+        for m in _RE_NETSH_FIELDS.finditer(body):
+            if m.lastgroup == 'chan':
+                channel = int(m.group('chan'))
+            else:
+                pct = int(m.group('sig'))
+                dbm = (pct / 100.0) * 50.0 - 100.0
+        freq = channel_to_freq_mhz(channel) if channel else None
+        networks.append({'ssid': ssid, 'freq_mhz': freq, 'dbm': dbm})
+    return networks